@@ -0,0 +1,113 @@
+# Загрузка таблиц точек (x, y) для лабораторных.
+# Текст разбирается крупными буферами (запятая как десятичный разделитель допускается):
+# число столбцов задаёт первая строка данных, из каждой строки берутся первые два.
+# .npy и сырые .bin (пары float64 x, y подряд) отображаются в память.
+import io
+import os
+
+import numpy as np
+
+BLOCK = 1 << 24
+
+
+def line_widths(buf):
+    # число полей в каждой строке буфера — по массиву байт, без списка токенов
+    b = np.frombuffer(buf, dtype=np.uint8)
+    sep = b <= 32
+    starts = np.flatnonzero(~sep[1:] & sep[:-1]) + 1
+    if len(b) and not sep[0]:
+        starts = np.concatenate([[0], starts])
+    newlines = np.flatnonzero(b == 10)
+    return np.bincount(np.searchsorted(newlines, starts), minlength=len(newlines) + 1)
+
+
+def parse_buffer(buf, ncols, first_line=1):
+    """Первые два столбца целых строк buf как массив (k, 2); во всех непустых
+    строках должно быть ncols полей, first_line — номер первой строки в файле."""
+    if b"," in buf:
+        buf = buf.replace(b",", b".")
+    widths = line_widths(buf)
+    bad = np.flatnonzero((widths != 0) & (widths != ncols))
+    if len(bad):
+        raise ValueError(f"строка {first_line + bad[0]}: {widths[bad[0]]} столбцов вместо {ncols}")
+    if not widths.any():
+        return np.zeros((0, 2))
+    return np.loadtxt(io.BytesIO(buf), usecols=(0, 1), ndmin=2, comments=None)
+
+
+def is_number(token):
+    try:
+        float(token.replace(b",", b"."))
+    except ValueError:
+        return False
+    return True
+
+
+def skip_header(fh):
+    # пропускаем строку из одного целого числа (количество точек) и текстовые
+    # заголовки вида "x y"; возвращает (число столбцов данных, число пропущенных строк)
+    skipped = 0
+    while True:
+        pos = fh.tell()
+        line = fh.readline()
+        if not line:
+            return 0, skipped
+        first = line.split()
+        count = len(first) == 1 and first[0].lstrip(b"+-").isdigit()
+        if not first or count or not all(is_number(t) for t in first[:2]):
+            skipped += 1
+            continue
+        fh.seek(pos)
+        if len(first) < 2:
+            raise ValueError(f"строка {skipped + 1}: ожидались пары чисел x y")
+        return len(first), skipped
+
+
+def open_pairs(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npy":
+        arr = np.load(path, mmap_mode="r")
+        return arr.T if arr.shape[0] == 2 and arr.shape[-1] != 2 else arr
+    if ext == ".bin":
+        return np.memmap(path, dtype=np.float64, mode="r").reshape(-1, 2)
+    return None
+
+
+def iter_point_chunks(path, rows=1_000_000, block=BLOCK):
+    pairs = open_pairs(path)
+    if pairs is not None:
+        for lo in range(0, len(pairs), rows):
+            part = np.asarray(pairs[lo:lo + rows], dtype=np.float64)
+            yield np.ascontiguousarray(part[:, 0]), np.ascontiguousarray(part[:, 1])
+        return
+    with open(path, "rb") as fh:
+        ncols, line_no = skip_header(fh)
+        tail = b""
+        while ncols:
+            buf = fh.read(block)
+            if not buf:
+                break
+            buf = tail + buf
+            cut = buf.rfind(b"\n") + 1
+            tail = buf[cut:]
+            if cut:
+                pts = parse_buffer(buf[:cut], ncols, line_no + 1)
+                line_no += buf.count(b"\n", 0, cut)
+                if len(pts):
+                    yield np.ascontiguousarray(pts[:, 0]), np.ascontiguousarray(pts[:, 1])
+        if tail.strip():
+            pts = parse_buffer(tail, ncols, line_no + 1)
+            yield np.ascontiguousarray(pts[:, 0]), np.ascontiguousarray(pts[:, 1])
+
+
+def load_points(path):
+    pairs = open_pairs(path)
+    if pairs is not None:
+        return (np.ascontiguousarray(pairs[:, 0], dtype=np.float64),
+                np.ascontiguousarray(pairs[:, 1], dtype=np.float64))
+    chunks = list(iter_point_chunks(path))
+    if not chunks:
+        return np.zeros(0), np.zeros(0)
+    if len(chunks) == 1:
+        return chunks[0]
+    return np.concatenate([c[0] for c in chunks]), np.concatenate([c[1] for c in chunks])
@@ -1,8 +1,16 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
-def gauss_seidel(A, b, tol, max_iter=10000):
+def gauss_seidel(A, b, tol, max_iter=10000, x0=None):
     n = len(b)
-    x = np.zeros(n)
+    x = np.zeros(n) if x0 is None else np.array(x0, dtype=float)
     for k in range(1, max_iter+1):
         x_old = x.copy()
         for i in range(n):
@@ -13,26 +21,363 @@ def gauss_seidel(A, b, tol, max_iter=10000):
             return x, k, err
     return x, k, err
 
-def make_diagonally_dominant(A, b):
+def sor_sweep(A, b, x, omega, reverse=False):
+    n = len(b)
+    for i in (range(n-1, -1, -1) if reverse else range(n)):
+        s = A[i] @ x - A[i, i]*x[i]
+        x[i] += omega*((b[i] - s)/A[i, i] - x[i])
+
+def estimate_omega(steps):
+    # коэффициент сжатия Зейделя по последним пробным итерациям,
+    # для согласованно упорядоченных матриц rho_GS = rho_J^2
+    tail = [s for s in steps[len(steps)//2:] if s > 0]
+    if len(tail) < 2:
+        return 1.0
+    rho = (tail[-1]/tail[0])**(1/(len(tail) - 1))
+    rho = min(max(rho, 0.0), 0.9999)
+    return 2/(1 + np.sqrt(1 - rho))
+
+def sor(A, b, tol, omega=None, symmetric=False, max_iter=10000, probe=10):
+    # omega=None: первые probe итераций с omega=1, затем подобранный omega
+    n = len(b)
+    x = np.zeros(n)
+    w = 1.0 if omega is None else omega
+    steps = []
+    history = []
+    for k in range(1, max_iter+1):
+        x_old = x.copy()
+        sor_sweep(A, b, x, w)
+        if symmetric:
+            sor_sweep(A, b, x, w, reverse=True)
+        err = np.abs(x - x_old)
+        history.append(float(np.linalg.norm(b - A @ x, ord=np.inf)))
+        if np.all(err < tol):
+            return x, k, err, w, history
+        if omega is None and k <= probe:
+            steps.append(err.max())
+            if k == probe:
+                w = estimate_omega(steps)
+    return x, k, err, w, history
+
+def residual(A, x, b, block=1 << 20):
+    # r = b - A x в float64 блоками строк (около block элементов), без полной копии A
+    r = np.array(b, dtype=np.float64)
+    rows = max(1, block // max(1, A.shape[1]))
+    for s in range(0, len(r), rows):
+        r[s:s+rows] -= np.asarray(A[s:s+rows], dtype=np.float64) @ x
+    return r
+
+def spill_to_disk(A):
+    # float64 A во временный файл; дальше строки читаются через memmap,
+    # и в памяти процесса остаётся только float32 копия из gauss_seidel_mixed
+    mm = np.memmap(tempfile.TemporaryFile(), dtype=np.float64, mode="w+", shape=A.shape)
+    mm[:] = A
+    mm.flush()
+    return mm
+
+def gauss_seidel_mixed(A, b, tol, max_iter=10000, inner_tol=1e-4):
+    # итерации Зейделя в float32 для поправки d: A d = r, уточнение x += d в float64;
+    # невязка считается по исходной A, а не по округлённой копии. Память под матрицу
+    # вдвое меньше, только если A — memmap (см. spill_to_disk), иначе A и A32 вместе — 1.5x
+    A32 = A.astype(np.float32)
+    n = len(b)
+    x = np.zeros(n)
+    r = residual(A, x, b)
+    total = 0
+    err = np.zeros(n)
+    while total < max_iter:
+        r32 = r.astype(np.float32)
+        d = np.zeros(n, dtype=np.float32)
+        while total < max_iter:
+            d_old = d.copy()
+            for i in range(n):
+                s = A32[i, :i] @ d[:i] + A32[i, i+1:] @ d_old[i+1:]
+                d[i] = (r32[i] - s)/A32[i, i]
+            total += 1
+            if np.abs(d - d_old).max() <= inner_tol*np.abs(d).max():
+                break
+        x += d
+        err = np.abs(d.astype(np.float64))
+        if np.all(err < tol):
+            break
+        r = residual(A, x, b)
+    return x, total, err
+
+def gauss_seidel_multi(A, B, tol, max_iter=10000):
+    # все правые части одним проходом, сошедшиеся столбцы выбывают
+    n, m = B.shape
+    X = np.zeros((n, m))
+    iters = np.full(m, max_iter)
+    err = np.zeros((n, m))
+    act = np.arange(m)
+    for k in range(1, max_iter+1):
+        Xa = X[:, act]
+        Xa_old = Xa.copy()
+        Ba = B[:, act]
+        for i in range(n):
+            Xa[i] = (Ba[i] - A[i, :i] @ Xa[:i] - A[i, i+1:] @ Xa[i+1:])/A[i, i]
+        X[:, act] = Xa
+        err[:, act] = np.abs(Xa - Xa_old)
+        done = np.all(err[:, act] < tol, axis=0)
+        iters[act[done]] = k
+        act = act[~done]
+        if len(act) == 0:
+            break
+    return X, iters, err
+
+def coo_to_csr(rows, cols, vals, n):
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    vals = np.asarray(vals, dtype=float)
+    keys, inv = np.unique(rows*n + cols, return_inverse=True)
+    data = np.zeros(len(keys))
+    np.add.at(data, inv, vals)
+    indices = keys % n
+    indptr = np.zeros(n+1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // n, minlength=n), out=indptr[1:])
+    return data, indices, indptr
+
+def dense_to_csr(A):
+    rows, cols = np.nonzero(A)
+    return coo_to_csr(rows, cols, A[rows, cols], A.shape[0])
+
+def csr_rows(indptr):
+    return np.repeat(np.arange(len(indptr)-1), np.diff(indptr))
+
+def csr_split_diag(data, indices, indptr):
+    n = len(indptr) - 1
+    rows = csr_rows(indptr)
+    on = indices == rows
+    diag = np.zeros(n)
+    np.add.at(diag, rows[on], data[on])
+    off = ~on
+    off_ptr = np.zeros(n+1, dtype=np.int64)
+    np.cumsum(np.bincount(rows[off], minlength=n), out=off_ptr[1:])
+    return diag, data[off], indices[off], off_ptr
+
+def csr_is_diagonally_dominant(data, indices, indptr):
+    diag, vals, _, off_ptr = csr_split_diag(data, indices, indptr)
+    off_sum = np.zeros(len(diag))
+    np.add.at(off_sum, csr_rows(off_ptr), np.abs(vals))
+    return bool(np.all(np.abs(diag) >= off_sum))
+
+def csr_norm_inf(data, indices, indptr):
+    sums = np.zeros(len(indptr)-1)
+    np.add.at(sums, csr_rows(indptr), np.abs(data))
+    return sums.max() if len(sums) else 0.0
+
+def gauss_seidel_sparse(A, b, tol, max_iter=10000):
+    # A = (data, indices, indptr); проход только по хранимым ненулевым
+    diag, vals, cols, ptr = csr_split_diag(*A)
+    d, v, c, p = diag.tolist(), vals.tolist(), cols.tolist(), ptr.tolist()
+    bl = np.asarray(b, dtype=float).tolist()
+    n = len(bl)
+    x = [0.0]*n
+    for k in range(1, max_iter+1):
+        x_old = x[:]
+        for i in range(n):
+            s = 0.0
+            for q in range(p[i], p[i+1]):
+                s += v[q]*x[c[q]]
+            x[i] = (bl[i] - s)/d[i]
+        err = np.abs(np.array(x) - np.array(x_old))
+        if np.all(err < tol):
+            return np.array(x), k, err
+    return np.array(x), k, err
+
+def dominant_places(A, block=1024):
+    # для каждой строки j — позиции i, где |a_ji| >= суммы остальных в строке;
+    # A читается блоками строк, своя позиция j ставится первой
+    adj = []
+    for s in range(0, A.shape[0], block):
+        absA = np.abs(A[s:s+block])
+        fit = 2*absA >= absA.sum(axis=1)[:, None]
+        for j, r in enumerate(fit, start=s):
+            cols = np.flatnonzero(r).tolist()
+            if r[j]:
+                cols.remove(j)
+                cols.insert(0, j)
+            adj.append(cols)
+    return adj
+
+def dominant_permutation(A):
+    # ищем совершенное паросочетание строк и позиций (алгоритм Куна);
+    # при уже имеющемся преобладании получается тождественная перестановка
     n = A.shape[0]
-    for i in range(n):
-        for j in range(i, n):
-            if abs(A[j, i]) >= np.sum(np.abs(A[j, :])) - abs(A[j, i]):
-                if j != i:
-                    A[[i, j]], b[[i, j]] = A[[j, i]].copy(), b[[j, i]].copy()
+    adj = dominant_places(A)
+    row_of = [-1]*n
+    col_of = [-1]*n
+    stamp = [-1]*n
+    for j in range(n):
+        parent = {}
+        found = -1
+        stack = [iter(adj[j])]
+        rows = [j]
+        while stack and found < 0:
+            for c in stack[-1]:
+                if stamp[c] != j:
+                    stamp[c] = j
+                    parent[c] = rows[-1]
+                    if row_of[c] < 0:
+                        found = c
+                    else:
+                        stack.append(iter(adj[row_of[c]]))
+                        rows.append(row_of[c])
+                    break
+            else:
+                stack.pop()
+                rows.pop()
+        if found < 0:
+            return None
+        c = found
+        while True:
+            r = parent[c]
+            prev = col_of[r]
+            row_of[c], col_of[r] = r, c
+            if r == j:
                 break
+            c = prev
+    return np.array(row_of)
+
+def color_rows(indices, indptr):
+    # жадная раскраска графа матрицы (A + A^T): строки одного цвета не связаны
+    n = len(indptr) - 1
+    rows = csr_rows(indptr)
+    r = np.concatenate([rows, indices])
+    c = np.concatenate([indices, rows])
+    keep = r != c
+    _, nb, ptr = coo_to_csr(r[keep], c[keep], np.ones(keep.sum()), n)
+    nb, ptr = nb.tolist(), ptr.tolist()
+    colors = [-1]*n
     for i in range(n):
-        if abs(A[i, i]) < np.sum(np.abs(A[i, :])) - abs(A[i, i]):
-            return False
+        used = {colors[j] for j in nb[ptr[i]:ptr[i+1]]}
+        col = 0
+        while col in used:
+            col += 1
+        colors[i] = col
+    return np.array(colors, dtype=np.int64)
+
+def gauss_seidel_multicolor(A, b, tol, max_iter=10000, workers=None, min_chunk=4096):
+    # внутри одного цвета строки обновляются независимо -> блок векторно, по потокам
+    diag, vals, cols, ptr = csr_split_diag(*A)
+    b = np.asarray(b, dtype=float)
+    n = len(b)
+    workers = workers or os.cpu_count() or 1
+    colors = color_rows(A[1], A[2])
+    ncolors = int(colors.max()) + 1 if n else 0
+    rows_all = csr_rows(ptr)
+    classes = []
+    for col in range(ncolors):
+        R = np.flatnonzero(colors == col)
+        sel_all = np.flatnonzero(colors[rows_all] == col)
+        er = rows_all[sel_all]
+        parts = max(1, min(workers, len(R)//min_chunk))
+        chunks = []
+        for rows in np.array_split(R, parts):
+            lo, hi = np.searchsorted(er, rows[0]), np.searchsorted(er, rows[-1], "right")
+            sel = sel_all[lo:hi]
+            lr = np.searchsorted(rows, rows_all[sel])
+            chunks.append((rows, lr, vals[sel], cols[sel], diag[rows], b[rows]))
+        classes.append(chunks)
+    x = np.zeros(n)
+
+    def update(ch):
+        rows, lr, v, c, d, br = ch
+        s = np.bincount(lr, weights=v*x[c], minlength=len(rows))
+        x[rows] = (br - s)/d
+
+    pool = ThreadPoolExecutor(workers) if workers > 1 else None
+    sweep_time = 0.0
+    try:
+        for k in range(1, max_iter+1):
+            x_old = x.copy()
+            t0 = time.perf_counter()
+            for chunks in classes:
+                if pool and len(chunks) > 1:
+                    list(pool.map(update, chunks))
+                else:
+                    for ch in chunks:
+                        update(ch)
+            sweep_time += time.perf_counter() - t0
+            err = np.abs(x - x_old)
+            if np.all(err < tol):
+                break
+    finally:
+        if pool:
+            pool.shutdown()
+    return x.copy(), k, err, ncolors, sweep_time/k
+
+def permute_rows(A, perm):
+    # A[i] <- A[perm[i]] по циклам перестановки с буфером в одну строку:
+    # нет полной копии, неподвижные строки (и страницы memmap) не затрагиваются
+    done = perm == np.arange(len(perm))
+    for start in np.flatnonzero(~done):
+        if done[start]:
+            continue
+        tmp = np.copy(A[start])
+        i = start
+        while perm[i] != start:
+            A[i] = A[perm[i]]
+            done[i] = True
+            i = perm[i]
+        A[i] = tmp
+        done[i] = True
+
+def make_diagonally_dominant(A, b):
+    perm = dominant_permutation(A)
+    if perm is None:
+        return False
+    permute_rows(A, perm)
+    permute_rows(b, perm)
     return True
 
+def norm_inf(A, block=1024):
+    return max((np.abs(A[s:s+block]).sum(axis=1).max() for s in range(0, A.shape[0], block)), default=0.0)
+
+def matrix_key(A):
+    h = hashlib.sha1(f"{A.shape}{A.dtype.str}".encode())
+    h.update(np.ascontiguousarray(A).data)
+    return h.hexdigest()
+
+def load_cache(fn):
+    cache = OrderedDict()
+    if fn and os.path.exists(fn):
+        with open(fn, "rb") as f:
+            cache.update(pickle.load(f))
+    return cache
+
+def save_cache(cache, fn):
+    with open(fn, "wb") as f:
+        pickle.dump(cache, f)
+
+def solve_cached(A, b, tol, cache, max_iter=10000, maxsize=32):
+    # кэш: хэш матрицы -> (перестановка строк, последнее сошедшееся решение) с вытеснением LRU
+    key = matrix_key(A)
+    if key in cache:
+        cache.move_to_end(key)
+        perm, x0 = cache[key]
+    else:
+        perm, x0 = dominant_permutation(A), None
+    if perm is None:
+        res = None
+    else:
+        res = gauss_seidel(A[perm], b[perm], tol, max_iter, x0=x0)
+        if np.all(res[2] < tol):
+            x0 = res[0]
+    cache[key] = (perm, x0)
+    while len(cache) > maxsize:
+        cache.popitem(last=False)
+    return res
+
 def read_matrix():
     mode = input("Чтение матрицы из файла? (y/n): ")
     if mode.lower() == "y":
         fn = input("Имя файла: ")
-        data = np.loadtxt(fn)
-        A = data[:, :-1]
-        b = data[:, -1]
+        if os.path.splitext(fn)[1].lower() in (".npy", ".npz", ".bin", ".raw"):
+            return read_binary(fn)
+        if input("Разреженный формат (строки i j a_ij, столбец n — b)? (y/n): ").lower() == "y":
+            return read_sparse(fn)
+        A, b = split_augmented(read_text_chunked(fn))
     else:
         n = int(input("n: "))
         A = np.zeros((n, n))
@@ -43,6 +388,59 @@ def read_matrix():
             b[i] = row[-1]
     return A, b
 
+def split_augmented(data):
+    n = data.shape[0]
+    A = data[:, :n]
+    b = data[:, n] if data.shape[1] == n+1 else data[:, n:]
+    return A, b
+
+def read_text_chunked(fn, chunk=4096):
+    # два прохода: размеры, затем разбор порциями строк в заранее выделенный массив
+    rows, cols = 0, 0
+    with open(fn) as f:
+        for line in f:
+            if line.strip():
+                cols = cols or len(line.split())
+                rows += 1
+        data = np.empty((rows, cols))
+        f.seek(0)
+        i, buf = 0, []
+        for line in f:
+            if line.strip():
+                buf.append(line)
+            if len(buf) == chunk:
+                data[i:i+len(buf)] = np.loadtxt(buf, ndmin=2)
+                i, buf = i + len(buf), []
+        if buf:
+            data[i:] = np.loadtxt(buf, ndmin=2)
+    return data
+
+def read_binary(fn):
+    # .npy и сырой float64 (n x n+1 по строкам) отображаются в память без копирования,
+    # mode="c" — копирование при записи, чтобы перестановка строк не трогала файл
+    ext = os.path.splitext(fn)[1].lower()
+    if ext == ".npz":
+        with np.load(fn) as z:
+            if "A" in z:
+                return z["A"], z["b"]
+            return split_augmented(z[z.files[0]])
+    if ext == ".npy":
+        return split_augmented(np.load(fn, mmap_mode="c"))
+    size = os.path.getsize(fn)//8
+    n = int((np.sqrt(1 + 4*size) - 1)/2)
+    if n*(n+1) != size:
+        raise ValueError("Размер файла не соответствует матрице n x (n+1)")
+    return split_augmented(np.memmap(fn, dtype=np.float64, mode="c", shape=(n, n+1)))
+
+def read_sparse(fn):
+    data = np.loadtxt(fn, ndmin=2)
+    rows, cols, vals = data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), data[:, 2]
+    n = int(rows.max()) + 1
+    rhs = cols == n
+    b = np.zeros(n)
+    np.add.at(b, rows[rhs], vals[rhs])
+    return coo_to_csr(rows[~rhs], cols[~rhs], vals[~rhs], n), b
+
 def read_tol():
     mode = input("Чтение точности из файла? (y/n): ")
     if mode.lower() == "y":
@@ -55,11 +453,50 @@ def read_tol():
 def main():
     A, b = read_matrix()
     tol = read_tol()
-    if not make_diagonally_dominant(A, b):
+    if isinstance(A, tuple):
+        if not csr_is_diagonally_dominant(*A):
+            print("Нет диагонального преобладания")
+            return
+        if input("Многоцветный параллельный режим? (y/n): ").lower() == "y":
+            x, iters, err, ncolors, sweep_time = gauss_seidel_multicolor(A, b, tol)
+            print("Число цветов:", ncolors)
+            print("Среднее время итерации, с:", sweep_time)
+        else:
+            x, iters, err = gauss_seidel_sparse(A, b, tol)
+        print("Норма матрицы (сумма по строкам, бесконечная):", csr_norm_inf(*A))
+        print("Решение x:", x)
+        print("Число итераций:", iters)
+        print("Вектор погрешностей:", err)
+        return
+    cache_fn = input("Файл кэша решений (пусто — без кэша): ").strip() if b.ndim == 1 else ""
+    if cache_fn:
+        cache = load_cache(cache_fn)
+        res = solve_cached(A, b, tol, cache)
+        save_cache(cache, cache_fn)
+        if res is None:
+            print("Невозможно добиться диагонального преобладания")
+            return
+        x, iters, err = res
+    elif not make_diagonally_dominant(A, b):
         print("Невозможно добиться диагонального преобладания")
         return
-    x, iters, err = gauss_seidel(A, b, tol)
-    norm = np.linalg.norm(A, ord=np.inf)
+    elif b.ndim == 2:
+        x, iters, err = gauss_seidel_multi(A, b, tol)
+    else:
+        method = input("Метод: 1 - Зейдель, 2 - SOR, 3 - SSOR, 4 - смешанная точность: ").strip()
+        if method == "4":
+            if not isinstance(A, np.memmap):
+                # b может быть срезом общего массива с A — копия, чтобы массив освободился
+                b = np.array(b)
+                A = spill_to_disk(A)
+            x, iters, err = gauss_seidel_mixed(A, b, tol)
+        elif method in ("2", "3"):
+            x, iters, err, omega, history = sor(A, b, tol, symmetric=method == "3")
+            print("Параметр релаксации ω:", omega)
+            print("Невязки по итерациям:", history)
+        else:
+            x, iters, err = gauss_seidel(A, b, tol)
+    norm = norm_inf(A)
     print("Норма матрицы (сумма по строкам, бесконечная):", norm)
     print("Решение x:", x)
     print("Число итераций:", iters)
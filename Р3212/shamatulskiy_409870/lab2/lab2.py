@@ -1,15 +1,20 @@
 import math
+import os
 import sys
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from plotting import curve, downsample, finish, pyplot
 
 def f1(x):
     return x**3 - 2*x - 5
 
 def f2(x):
-    return math.sin(x) - 0.5*x
+    return np.sin(x) - 0.5*x
 
 def f3(x):
-    return math.exp(-x) - x
+    return np.exp(-x) - x
 
 functions = {
     '1': ('x^3 - 2x - 5', f1),
@@ -30,10 +35,11 @@ def bisection(f,a,b,eps):
     n=0
     while (b-a)/2>eps:
         c=(a+b)/2
-        if f(a)*f(c)<=0:
+        fc=f(c)
+        if fa*fc<=0:
             b=c
         else:
-            a=c
+            a,fa=c,fc
         n+=1
     return (a+b)/2,f((a+b)/2),n
 
@@ -47,6 +53,124 @@ def secant(f,a,b,eps):
         n+=1
     return b,f(b),n
 
+def lanes(f,x,args,idx=None):
+    # f(x,*args) только для активных отрезков: параметры берутся по тем же индексам
+    if idx is None:
+        return f(x,*args)
+    return f(x,*(p.flat[idx] for p in args))
+
+def brent(f,a,b,eps,max_evals=100):
+    # бисекция + секущие + обратная квадратичная интерполяция (Брент),
+    # значения на концах запоминаются, число вызовов f ограничено max_evals;
+    # возвращает (корень, f(корень), число вызовов, достигнута ли точность eps)
+    fa,fb=f(a),f(b)
+    calls=2
+    if fa*fb>0: return None,None,calls,False
+    c,fc=a,fa
+    d=e=b-a
+    converged=False
+    while True:
+        if fb*fc>0:
+            c,fc=a,fa
+            d=e=b-a
+        if abs(fc)<abs(fb):
+            a,b,c=b,c,b
+            fa,fb,fc=fb,fc,fb
+        tol=2*sys.float_info.epsilon*abs(b)+eps/2
+        m=(c-b)/2
+        if abs(m)<=tol or fb==0:
+            converged=True
+            break
+        if calls>=max_evals: break
+        if abs(e)>=tol and abs(fa)>abs(fb):
+            s=fb/fa
+            if a==c:
+                p=2*m*s
+                q=1-s
+            else:
+                q,r=fa/fc,fb/fc
+                p=s*(2*m*q*(q-r)-(b-a)*(r-1))
+                q=(q-1)*(r-1)*(s-1)
+            if p>0: q=-q
+            else: p=-p
+            if 2*p<min(3*m*q-abs(tol*q),abs(e*q)):
+                e,d=d,p/q
+            else:
+                d=e=m
+        else:
+            d=e=m
+        a,fa=b,fb
+        b+=d if abs(d)>tol else (tol if m>0 else -tol)
+        fb=f(b)
+        calls+=1
+    return b,fb,calls,converged
+
+def bisection_vec(f,a,b,eps,args=(),max_iter=200):
+    # все отрезки сразу, сошедшиеся отрезки выбывают из вычислений
+    a,b,*args=np.broadcast_arrays(*(np.asarray(v,dtype=float) for v in (a,b,*args)))
+    a,b=a.copy(),b.copy()
+    fa,fb=lanes(f,a,args),lanes(f,b,args)
+    ok=fa*fb<=0
+    n=np.zeros(a.shape,dtype=int)
+    act=ok&((b-a)/2>eps)
+    for _ in range(max_iter):
+        idx=np.flatnonzero(act)
+        if not len(idx): break
+        c=(a.flat[idx]+b.flat[idx])/2
+        fc=lanes(f,c,args,idx)
+        left=fa.flat[idx]*fc<=0
+        b.flat[idx[left]]=c[left]
+        a.flat[idx[~left]]=c[~left]
+        fa.flat[idx[~left]]=fc[~left]
+        n.flat[idx]+=1
+        act.flat[idx]=(b.flat[idx]-a.flat[idx])/2>eps
+    root=np.where(ok,(a+b)/2,np.nan)
+    return root,lanes(f,root,args),n
+
+def secant_vec(f,a,b,eps,args=(),max_iter=200):
+    a,b,*args=np.broadcast_arrays(*(np.asarray(v,dtype=float) for v in (a,b,*args)))
+    a,b=a.copy(),b.copy()
+    fa,fb=lanes(f,a,args),lanes(f,b,args)
+    ok=fa!=fb
+    n=np.zeros(a.shape,dtype=int)
+    act=ok&(np.abs(b-a)>eps)
+    for _ in range(max_iter):
+        idx=np.flatnonzero(act)
+        if not len(idx): break
+        a0,b0,fa0,fb0=a.flat[idx],b.flat[idx],fa.flat[idx],fb.flat[idx]
+        c=b0-fb0*(b0-a0)/(fb0-fa0)
+        fc=lanes(f,c,args,idx)
+        a.flat[idx],fa.flat[idx]=b0,fb0
+        b.flat[idx],fb.flat[idx]=c,fc
+        n.flat[idx]+=1
+        act.flat[idx]=(np.abs(c-b0)>eps)&(fc!=fb0)&np.isfinite(c)
+    root=np.where(ok,b,np.nan)
+    return root,np.where(ok,fb,np.nan),n
+
+def refine_bracket(job):
+    f,a,b,eps=job
+    return bisection(f,a,b,eps)
+
+def find_all_roots(f,a,b,eps,n_grid=10000,workers=None,processes=False):
+    # смена знака на равномерной сетке -> уточнение всех отрезков сразу;
+    # workers: дорогая скалярная f считается в пуле потоков/процессов
+    xs=np.linspace(a,b,n_grid+1)
+    if workers:
+        pool=(ProcessPoolExecutor if processes else ThreadPoolExecutor)(workers)
+        with pool:
+            ys=np.fromiter(pool.map(f,xs,chunksize=max(1,len(xs)//(4*workers))),dtype=float,count=len(xs))
+            idx=np.flatnonzero(ys[:-1]*ys[1:]<0)
+            res=list(pool.map(refine_bracket,[(f,xs[i],xs[i+1],eps) for i in idx]))
+        roots=np.array([r[0] for r in res]); vals=np.array([r[1] for r in res]); its=np.array([r[2] for r in res],dtype=int)
+    else:
+        ys=f(xs)
+        idx=np.flatnonzero(ys[:-1]*ys[1:]<0)
+        roots,vals,its=bisection_vec(f,xs[idx],xs[idx+1],eps)
+    zero=np.flatnonzero(ys==0)
+    roots=np.concatenate([roots,xs[zero]]); vals=np.concatenate([vals,ys[zero]]); its=np.concatenate([its,np.zeros(len(zero),dtype=int)])
+    order=np.argsort(roots)
+    return roots[order],vals[order],its[order]
+
 def simple_iter(f,phi,a,b,eps):
     mp = max(abs((phi(a+1e-6)-phi(a))/1e-6),abs((phi(b)-phi(b-1e-6))/1e-6))
     if mp>=1: return 'bad',None,None
@@ -73,7 +197,7 @@ def get_input():
         for k,v in functions.items():
             print(k,v[0])
         eq=input('Выберите номер функции: ')
-        print('Методы: 1-бисекция, 2-секущие, 3-простая итерация')
+        print('Методы: 1-бисекция, 2-секущие, 3-простая итерация, 4-все корни на интервале, 5-Брент')
         method=input('Выберите метод: ')
         a=float(input('a= '))
         b=float(input('b= '))
@@ -93,24 +217,34 @@ def output(root,val,iter_count):
         print('Итераций:',iter_count)
 
 def plot(f,a,b):
-    xs=[a+i*(b-a)/1000 for i in range(1001)]
-    ys=[f(x) for x in xs]
-    plt.plot(xs,ys)
+    plt=pyplot()
+    xs,ys=curve(f,a,b,1001)
+    plt.plot(*downsample(xs,ys))
     plt.axhline(0, color='black')
-    plt.show()
+    finish('lab2')
 
 def main():
     eq,method,a,b,eps=get_input()
     desc,f=functions.get(eq,(None,None))
     if f is None:
         print('Неизвестная функция'); sys.exit()
-    fa,fb=f(a),f(b)
-    if method in ('1','2') and fa*fb>0:
+    if method in ('1','2') and f(a)*f(b)>0:
         print('На интервале нет единственного корня'); sys.exit()
     if method=='1':
         root,val,it=bisection(f,a,b,eps)
     elif method=='2':
         root,val,it=secant(f,a,b,eps)
+    elif method=='5':
+        root,val,it,converged=brent(f,a,b,eps)
+        if root is None:
+            print('На интервале нет единственного корня'); sys.exit()
+        if not converged:
+            print('Лимит вычислений f исчерпан, точность не достигнута')
+    elif method=='4':
+        roots,vals,its=find_all_roots(f,a,b,eps)
+        if not len(roots):
+            print('На интервале корней не найдено'); sys.exit()
+        root,val,it=roots.tolist(),vals.tolist(),its.tolist()
     else:
         phi=phis.get(eq)
         if not phi:
@@ -1,7 +1,10 @@
 import math
+import os
 import sys
 import numpy as np
-import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from plotting import finish, mesh, pyplot
 
 def sys1(x):
     u,v = x
@@ -13,7 +16,7 @@ def phi1(x):
 
 def sys2(x):
     u,v = x
-    return np.array([math.sin(u) + v - 1, u + math.cos(v) - 1])
+    return np.array([np.sin(u) + v - 1, u + np.cos(v) - 1])
 
 def phi2(x):
     u,v = x
@@ -24,6 +27,19 @@ systems = {
     '2': (sys2, phi2),
 }
 
+def jac1(x):
+    u,v = x
+    return np.array([[2*u, 2*v], [v, u]])
+
+def jac2(x):
+    u,v = x
+    return np.array([[math.cos(u), 1], [1, -math.sin(v)]])
+
+jacobians = {
+    '1': jac1,
+    '2': jac2,
+}
+
 def jacobian(phi, x, h=1e-6):
     n = len(x)
     J = np.zeros((n,n))
@@ -32,6 +48,46 @@ def jacobian(phi, x, h=1e-6):
         J[:,i] = (phi(x+dx) - phi(x-dx))/(2*h)
     return J
 
+def fd_inverse(F, x, Fx, h):
+    # обратная к конечно-разностной матрице Якоби в x; LinAlgError, если она вырождена
+    n = len(x)
+    J = np.zeros((n,n))
+    for i in range(n):
+        dx = np.zeros(n); dx[i] = h
+        J[:,i] = (F(x+dx) - Fx)/h
+    return np.linalg.inv(J)
+
+def broyden(F, x0, eps, jac=None, maxit=100, h=1e-7):
+    # jac задан -> метод Ньютона; иначе одна конечно-разностная матрица в x0
+    # и ранговые обновления обратного якобиана (метод Бройдена), O(n^2) на шаг.
+    # При нулевом знаменателе обновления матрица считается заново в текущей точке;
+    # вырожденный якобиан -> (None, k, errors), как и при исчерпании итераций
+    x = np.array(x0, dtype=float)
+    Fx = np.asarray(F(x), dtype=float)
+    errors = []
+    try:
+        if jac is None:
+            H = fd_inverse(F, x, Fx, h)
+        for k in range(1, maxit+1):
+            dx = np.linalg.solve(jac(x), -Fx) if jac else -H @ Fx
+            x = x + dx
+            F_new = np.asarray(F(x), dtype=float)
+            err = np.abs(dx)
+            errors.append(err)
+            if np.all(err < eps):
+                return x, k, errors
+            if jac is None:
+                Hdf = H @ (F_new - Fx)
+                denom = dx @ Hdf
+                if denom == 0 or not np.isfinite(denom):
+                    H = fd_inverse(F, x, F_new, h)
+                else:
+                    H += np.outer(dx - Hdf, dx @ H)/denom
+            Fx = F_new
+    except np.linalg.LinAlgError:
+        return None, len(errors), errors
+    return None, maxit, errors
+
 def simple_iter(sysf, phi, x0, eps, maxit=1000):
     J = jacobian(phi, x0)
     if max(abs(np.linalg.eigvals(J))) >= 1:
@@ -54,7 +110,8 @@ def get_input():
     sysn = input('Выберите номер системы: ')
     x0 = float(input('x0= ')), float(input('y0= '))
     eps = float(input('ε= '))
-    return sysn, x0, eps
+    method = input('Метод: 1 - простая итерация, 2 - Бройден, 3 - Ньютон: ').strip()
+    return sysn, x0, eps, method
 
 def output(x, it, err):
     if input('Вывод в файл? (y/n) ').lower()=='y':
@@ -69,23 +126,25 @@ def output(x, it, err):
         print('Ошибка последней итерации =', err)
 
 def plot(sysf, a=-2, b=2):
-    xs = np.linspace(a, b, 400)
-    ys = np.linspace(a, b, 400)
-    X, Y = np.meshgrid(xs, ys)
-    Z1 = sysf([X, Y])[0]
-    Z2 = sysf([X, Y])[1]
-    plt.contour(X, Y, Z1, levels=[0])
-    plt.contour(X, Y, Z2, levels=[0])
+    plt = pyplot()
+    X, Y, Z = mesh(sysf, a, b, 400)
+    plt.contour(X, Y, Z[0], levels=[0])
+    plt.contour(X, Y, Z[1], levels=[0])
     plt.axhline(0, color='black')
     plt.axvline(0, color='black')
-    plt.show()
+    finish('lab2_system')
 
 def main():
-    sysn, x0, eps = get_input()
+    sysn, x0, eps, method = get_input()
     sysf, phi = systems.get(sysn, (None,None))
     if not sysf:
         print('Неизвестная система'); sys.exit()
-    x, it, errors = simple_iter(sysf, phi, x0, eps)
+    if method in ('2', '3'):
+        x, it, errors = broyden(sysf, x0, eps, jac=jacobians[sysn] if method == '3' else None)
+        if x is None:
+            print('Не сошлось: вырожденная матрица Якоби или превышено число итераций'); sys.exit()
+    else:
+        x, it, errors = simple_iter(sysf, phi, x0, eps)
     output(x, it, list(errors[-1]))
     plot(sysf)
 
@@ -1,5 +1,12 @@
+import argparse
+import heapq
+import json
 import math
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
 
 
 def f1(x):
@@ -8,11 +15,11 @@ def f1(x):
 
 def f2(x):
     """f(x) = sin(x)"""
-    return math.sin(x)
+    return np.sin(x)
 
 def f3(x):
     """f(x) = e^x"""
-    return math.exp(x)
+    return np.exp(x)
 
 def f4(x):
     """f(x) = 1/x (при x ≠ 0)"""
@@ -24,8 +31,37 @@ def f5(x):
 
 functions = [f1, f2, f3, f4, f5]
 
+# ошибки при вычислении f (деление на 0, переполнение, выход из области) — расходимость
+EVAL_ERRORS = (ZeroDivisionError, OverflowError, ValueError)
+
+def node_sum(f, a, h, start, stop, step=1, shift=0.0, chunk=1 << 20):
+    """Сумма f(a + (i + shift) * h), i in range(start, stop, step), массивами по chunk узлов.
+    None, если f не принимает массивы numpy."""
+    total = 0.0
+    for lo in range(start, stop, step * chunk):
+        i = np.arange(lo, min(stop, lo + step * chunk), step)
+        xs = a + (i + shift) * h
+        try:
+            ys = np.asarray(f(xs), dtype=float)
+        except (TypeError, ValueError):
+            return None
+        if ys.shape != xs.shape:
+            return None
+        total += float(ys.sum())
+    return total
+
 def rectangle_method(f, a, b, n, mode="left"):
     h = (b - a) / n
+    if mode not in ("left", "right", "middle"):
+        raise ValueError("Неизвестный режим прямоугольников.")
+    if mode == "left":
+        total = node_sum(f, a, h, 0, n)
+    elif mode == "right":
+        total = node_sum(f, a, h, 1, n+1)
+    else:
+        total = node_sum(f, a, h, 0, n, shift=0.5)
+    if total is not None:
+        return total * h
     total = 0.0
 
     if mode == "left":
@@ -42,14 +78,15 @@ def rectangle_method(f, a, b, n, mode="left"):
         for i in range(n):
             x = a + (i + 0.5) * h
             total += f(x)
-    else:
-        raise ValueError("Неизвестный режим прямоугольников.")
 
     return total * h
 
 def trapezoid_method(f, a, b, n):
     h = (b - a) / n
     total = 0.5 * (f(a) + f(b))
+    inner = node_sum(f, a, h, 1, n)
+    if inner is not None:
+        return (total + inner) * h
     for i in range(1, n):
         x = a + i * h
         total += f(x)
@@ -61,48 +98,329 @@ def simpson_method(f, a, b, n):
 
     h = (b - a) / n
     total = f(a) + f(b)
-    odd_sum = 0.0
-    even_sum = 0.0
-    for k in range(1, n):
-        x = a + k * h
-        if k % 2 == 0:
-            even_sum += f(x)
-        else:
-            odd_sum += f(x)
+    odd_sum = node_sum(f, a, h, 1, n, 2)
+    even_sum = node_sum(f, a, h, 2, n, 2)
+    if odd_sum is None or even_sum is None:
+        odd_sum = 0.0
+        even_sum = 0.0
+        for k in range(1, n):
+            x = a + k * h
+            if k % 2 == 0:
+                even_sum += f(x)
+            else:
+                odd_sum += f(x)
     total += 4 * odd_sum + 2 * even_sum
     return total * h / 3.0
 
-def integrate_with_precision(f, a, b, eps, method_name="rectangle", mode="left", n_init=4):
+def runge_factor(method_name, mode):
     if method_name == "rectangle":
-        method_func = lambda f,a,b,n: rectangle_method(f,a,b,n,mode=mode)
+        if mode not in ("left", "right", "middle"):
+            raise ValueError("Неизвестный режим прямоугольников.")
         p = 2 if mode == "middle" else 1
         if p == 2:
-            runge_factor = 1.0/3.0
-        else:
-            runge_factor = 1.0  # Если p=1
-
+            return 1.0/3.0
+        return 1.0  # Если p=1
+    if method_name == "trapezoid":
+        return 1.0/3.0
+    if method_name == "simpson":
+        return 1.0/15.0
+    if method_name == "romberg":
+        return 1.0
+    raise ValueError("Неизвестный метод: " + method_name)
+
+def plain_levels(f, a, b, method_name, mode, n_init):
+    # (I_new, I_old, n, evals) при удвоении n, каждый раз с нуля
+    if method_name == "rectangle":
+        method_func = lambda f,a,b,n: rectangle_method(f,a,b,n,mode=mode)
     elif method_name == "trapezoid":
         method_func = trapezoid_method
-        runge_factor = 1.0/3.0
-
     elif method_name == "simpson":
         method_func = simpson_method
-        runge_factor = 1.0/15.0
-
     else:
         raise ValueError("Неизвестный метод: " + method_name)
-
     n = n_init
-    I_old = method_func(f, a, b, n)
-    while True:
-        n *= 2
-        I_new = method_func(f, a, b, n)
+    cost = lambda n: n if method_name == "rectangle" else n + 1 + (method_name == "simpson" and n % 2)
+    evals = 0
+    try:
+        I_old = method_func(f, a, b, n)
+        evals = cost(n)
+        while True:
+            n *= 2
+            I_new = method_func(f, a, b, n)
+            evals += cost(n)
+            yield I_new, I_old, n, evals
+            I_old = I_new
+    except EVAL_ERRORS:
+        yield math.nan, math.nan, n, evals
+
+def mid_sum(f, a, h, n):
+    total = node_sum(f, a, h, 0, n, shift=0.5)
+    if total is None:
+        total = 0.0
+        for i in range(n):
+            total += f(a + (i + 0.5) * h)
+    return total
+
+def nested_levels(f, a, b, method_name, mode, n_init):
+    # то же, но при удвоении n функция считается только в новых серединах;
+    # romberg — экстраполяция Ричардсона по трапециям
+    n = (n_init + 1) // 2 if method_name == "simpson" else n_init
+    h = (b - a) / n
+    midpoint = method_name == "rectangle" and mode == "middle"
+    evals = 0
+    try:
+        if midpoint:
+            # средним прямоугольникам узлы сетки и концы отрезка не нужны
+            I_old = None
+        else:
+            fa, fb = f(a), f(b)
+            inner = node_sum(f, a, h, 1, n)
+            if inner is None:
+                inner = sum(f(a + i * h) for i in range(1, n))
+            evals = n + 1
+            left, right, trap = (fa + inner) * h, (inner + fb) * h, (0.5 * (fa + fb) + inner) * h
+            row = [trap]
+            # у Симпсона первая оценка Рунге — по двум значениям Симпсона, не по трапеции
+            I_old = {"left": left, "right": right}.get(mode) if method_name == "rectangle" else (
+                None if method_name == "simpson" else trap)
+        while True:
+            mid = mid_sum(f, a, h, n) * h
+            evals += n
+            if midpoint:
+                I_new, n_new = mid, n
+                n, h = 2 * n, h / 2
+                if I_old is not None:
+                    yield I_new, I_old, n_new, evals
+                I_old = I_new
+                continue
+            n, h = 2 * n, h / 2
+            left, right, trap_new = (left + mid) / 2, (right + mid) / 2, (trap + mid) / 2
+            if method_name == "rectangle":
+                I_new, n_new = (left if mode == "left" else right), n
+            elif method_name == "trapezoid":
+                I_new, n_new = trap_new, n
+            elif method_name == "simpson":
+                I_new, n_new = (4 * trap_new - trap) / 3, n
+            elif method_name == "romberg":
+                new_row = [trap_new]
+                for j in range(1, len(row) + 1):
+                    new_row.append(new_row[j-1] + (new_row[j-1] - row[j-1]) / (4**j - 1))
+                row = new_row
+                I_old, I_new, n_new = row[-2], row[-1], n
+            trap = trap_new
+            if I_old is not None:
+                yield I_new, I_old, n_new, evals
+            I_old = I_new
+    except EVAL_ERRORS:
+        yield math.nan, math.nan, n, evals
+
+def refine_until(levels, eps, runge_factor, max_n=2**28, max_evals=None, time_limit=None,
+                 cancel=None, patience=4):
+    """Уточнение до оценки Рунге < eps с ограничениями. Возвращает словарь
+    value, n, evals, error, reason; reason — converged, diverged, stalled,
+    max_n, max_evals, time_limit или cancelled."""
+    started = time.monotonic()
+    res = {"value": math.nan, "n": 0, "evals": 0, "error": math.inf, "reason": "max_n"}
+    worse = 0
+    for I_new, I_old, n, evals in levels:
         # оценка погрешности по правилу Рунге:
         error_est = abs(I_new - I_old) * runge_factor
-
+        if not math.isfinite(I_new):
+            res.update(evals=evals, reason="diverged")
+            return res
+        worse = worse + 1 if error_est >= res["error"] else 0
+        if error_est < res["error"] or res["n"] == 0:
+            res.update(value=I_new, n=n, error=error_est)
+        res["evals"] = evals
         if error_est < eps:
-            return I_new, n
-        I_old = I_new
+            res.update(value=I_new, n=n, error=error_est, reason="converged")
+            return res
+        if worse >= patience:
+            res["reason"] = "stalled"
+            return res
+        if 2 * n > max_n:
+            res["reason"] = "max_n"
+            return res
+        if max_evals is not None and evals >= max_evals:
+            res["reason"] = "max_evals"
+            return res
+        if time_limit is not None and time.monotonic() - started > time_limit:
+            res["reason"] = "time_limit"
+            return res
+        if cancel is not None and cancel.is_set():
+            res["reason"] = "cancelled"
+            return res
+    return res
+
+def integrate_limited(f, a, b, eps, method_name="rectangle", mode="left", n_init=4, nested=True, **limits):
+    levels = (nested_levels if nested else plain_levels)(f, a, b, method_name, mode, n_init)
+    return refine_until(levels, eps, runge_factor(method_name, mode), **limits)
+
+def integrate_with_precision(f, a, b, eps, method_name="rectangle", mode="left", n_init=4, **limits):
+    # вложенные сетки: при удвоении n считаются только новые узлы;
+    # число вычислений f — в integrate_limited(...)["evals"]
+    res = integrate_limited(f, a, b, eps, method_name, mode, n_init, **limits)
+    if res["reason"] != "converged":
+        raise RuntimeError(f"Точность не достигнута ({res['reason']}), оценка {res['value']}, погрешность {res['error']}")
+    return res["value"], res["n"]
+
+def simpson_panel(a, b, fa, fm, fb):
+    return (b - a) * (fa + 4 * fm + fb) / 6
+
+def split_panel(f, a, b, fa, fm, fb, S):
+    m = (a + b) / 2
+    flm, frm = f((a + m) / 2), f((m + b) / 2)
+    L = simpson_panel(a, m, fa, flm, fm)
+    R = simpson_panel(m, b, fm, frm, fb)
+    err = abs(L + R - S) / 15
+    return (-err, a, b, fa, fm, fb, flm, frm, L, R)
+
+def adaptive_simpson(f, a, b, eps, max_evals=10**6, time_limit=None):
+    """Адаптивный Симпсон: делится только отрезок с наибольшей локальной оценкой погрешности,
+    пока хватает max_evals вычислений f и не истекло time_limit секунд.
+    Возвращает (I, число отрезков сетки, число вычислений f, оценка погрешности);
+    если интеграл расходится (ошибка вычисления f или бесконечные значения), I = nan."""
+    started = time.monotonic()
+    evals = 0
+    try:
+        fa, fm, fb = f(a), f((a + b) / 2), f(b)
+        heap = [split_panel(f, a, b, fa, fm, fb, simpson_panel(a, b, fa, fm, fb))]
+        evals = 5
+        err_total = -heap[0][0]
+        while err_total >= eps and evals + 4 <= max_evals:
+            if time_limit is not None and time.monotonic() - started > time_limit:
+                break
+            neg_err, a0, b0, fa0, fm0, fb0, flm, frm, L, R = heapq.heappop(heap)
+            m = (a0 + b0) / 2
+            left = split_panel(f, a0, m, fa0, flm, fm0, L)
+            right = split_panel(f, m, b0, fm0, frm, fb0, R)
+            evals += 4
+            heapq.heappush(heap, left)
+            heapq.heappush(heap, right)
+            err_total += neg_err - left[0] - right[0]
+    except EVAL_ERRORS:
+        return math.nan, 0, evals, math.inf
+    I = math.fsum(L + R + (L + R - (simpson_panel(a0, b0, fa0, fm0, fb0))) / 15
+                  for _, a0, b0, fa0, fm0, fb0, _, _, L, R in heap)
+    err_total = math.fsum(-item[0] for item in heap)
+    if not math.isfinite(I):
+        return math.nan, 2 * len(heap), evals, math.inf
+    return I, 2 * len(heap), evals, err_total
+
+def adaptive_reason(I, err_est, eps, evals=0, max_evals=10**6):
+    # причина остановки adaptive_simpson в тех же терминах, что у refine_until
+    if math.isnan(I):
+        return "diverged"
+    if err_est < eps:
+        return "converged"
+    return "max_evals" if evals + 4 > max_evals else "time_limit"
+
+BATCH_METHODS = ("rectangle", "trapezoid", "simpson", "romberg", "adaptive")
+
+def read_jobs(path):
+    # строка задания: номер_функции a b eps метод [режим]; # — комментарий
+    jobs = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            parts = line.split("#")[0].replace(",", ".").split()
+            if not parts:
+                continue
+            if len(parts) < 5:
+                raise ValueError(f"Неполное задание: {line.strip()}")
+            fi, a, b, eps, method_name = int(parts[0]), float(parts[1]), float(parts[2]), float(parts[3]), parts[4]
+            mode = parts[5] if len(parts) > 5 else ("left" if method_name == "rectangle" else "")
+            if not 1 <= fi <= len(functions):
+                raise ValueError(f"Неизвестная функция в задании: {line.strip()}")
+            if method_name not in BATCH_METHODS:
+                raise ValueError(f"Неизвестный метод в задании: {line.strip()}")
+            if method_name == "rectangle" and mode not in ("left", "right", "middle"):
+                raise ValueError(f"Неизвестный режим прямоугольников в задании: {line.strip()}")
+            jobs.append((fi, min(a, b), max(a, b), eps, method_name, mode))
+    return jobs
+
+def error_result(exc):
+    return {"value": math.nan, "n": 0, "evals": 0, "error": math.inf, "reason": "error",
+            "message": f"{type(exc).__name__}: {exc}"}
+
+def run_chunk(task):
+    # (номер задания, результат, секунды по часам, секунды процессора);
+    # исключение в части задания превращается в reason="error" с текстом ошибки
+    job_id, fi, a, b, eps, method_name, mode, limits = task
+    started, cpu_started = time.perf_counter(), time.process_time()
+    f = functions[fi - 1]
+    try:
+        if method_name == "adaptive":
+            max_evals = limits.get("max_evals") or 10**6
+            I, N, evals, err_est = adaptive_simpson(f, a, b, eps, max_evals, limits.get("time_limit"))
+            res = {"value": I, "n": N, "evals": evals, "error": err_est,
+                   "reason": adaptive_reason(I, err_est, eps, evals, max_evals)}
+        else:
+            res = integrate_limited(f, a, b, eps, method_name, mode, **limits)
+    except Exception as exc:
+        res = error_result(exc)
+    return job_id, res, time.perf_counter() - started, time.process_time() - cpu_started
+
+def run_batch(jobs_path, out_path, workers=None, split=1, **limits):
+    """Пакетное интегрирование в пуле процессов: каждый отрезок делится на split
+    частей (eps делится поровну), строка результата (JSON) пишется в out_path,
+    как только готовы все части задания."""
+    jobs = read_jobs(jobs_path)
+    pending = {}
+    with ProcessPoolExecutor(workers) as pool, open(out_path, "w", encoding="utf-8") as out:
+        futures = {}
+        for job_id, (fi, a, b, eps, method_name, mode) in enumerate(jobs):
+            edges = [a + (b - a) * k / split for k in range(split + 1)]
+            pending[job_id] = {"parts": [], "started": time.perf_counter()}
+            for k in range(split):
+                fut = pool.submit(run_chunk, (job_id, fi, edges[k], edges[k+1], eps / split,
+                                              method_name, mode, limits))
+                futures[fut] = job_id
+        for fut in as_completed(futures):
+            try:
+                job_id, res, wall, cpu = fut.result()
+            except Exception as exc:
+                # сбой самого процесса-исполнителя: задание всё равно получает запись
+                job_id, res, wall, cpu = futures[fut], error_result(exc), 0.0, 0.0
+            state = pending[job_id]
+            state["parts"].append((res, wall, cpu))
+            if len(state["parts"]) < split:
+                continue
+            fi, a, b, eps, method_name, mode = jobs[job_id]
+            parts = [r for r, _, _ in state["parts"]]
+            failed = [r["reason"] for r in parts if r["reason"] != "converged"]
+            failed.sort(key=lambda reason: reason != "error")
+            messages = sorted({r["message"] for r in parts if "message" in r})
+            record = {
+                "job": job_id, "function": functions[fi - 1].__doc__, "a": a, "b": b, "eps": eps,
+                "method": method_name, "mode": mode,
+                "value": math.fsum(r["value"] for r in parts),
+                "error": math.fsum(r["error"] for r in parts),
+                "evals": sum(r["evals"] for r in parts),
+                "reason": failed[0] if failed else "converged",
+                # время счёта частей; elapsed_seconds — от постановки в очередь до записи
+                "seconds": sum(t for _, t, _ in state["parts"]),
+                "cpu_seconds": sum(t for _, _, t in state["parts"]),
+                "elapsed_seconds": time.perf_counter() - state["started"],
+            }
+            if messages:
+                record["message"] = "; ".join(messages)
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            del pending[job_id]
+    return len(jobs)
+
+def batch_main(argv):
+    parser = argparse.ArgumentParser(description="Пакетное интегрирование")
+    parser.add_argument("jobs")
+    parser.add_argument("out")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--split", type=int, default=1)
+    parser.add_argument("--time-limit", type=float, default=None)
+    parser.add_argument("--max-evals", type=int, default=None)
+    args = parser.parse_args(argv)
+    count = run_batch(args.jobs, args.out, args.workers, args.split,
+                      time_limit=args.time_limit, max_evals=args.max_evals)
+    print(f"Обработано заданий: {count}, результаты в {args.out}")
 
 def main():
     print("Выберите функцию для интегрирования:")
@@ -133,6 +451,8 @@ def main():
     print("3) Прямоугольники (средние)")
     print("4) Трапеции")
     print("5) Симпсон")
+    print("6) Ромберг")
+    print("7) Адаптивный Симпсон")
 
     method_choice = int(input("Номер метода: "))
 
@@ -151,18 +471,41 @@ def main():
     elif method_choice == 5:
         method_name = "simpson"
         mode = ""
+    elif method_choice == 6:
+        method_name = "romberg"
+        mode = ""
+    elif method_choice == 7:
+        method_name = "adaptive"
+        mode = ""
     else:
         print("Некорректный выбор метода. Завершение.", file=sys.stderr)
         return
 
-    I, N = integrate_with_precision(f, min(a, b), max(a, b), eps, method_name, mode, n_init)
+    if method_name == "adaptive":
+        I, N, evals, err_est = adaptive_simpson(f, min(a, b), max(a, b), eps)
+        reason = adaptive_reason(I, err_est, eps, evals)
+        if reason != "converged":
+            print(f"Заданная точность не достигнута (причина: {reason}), "
+                  f"достигнутая оценка погрешности: {err_est:.3e}")
+    else:
+        res = integrate_limited(f, min(a, b), max(a, b), eps, method_name, mode, n_init)
+        I, N, evals, err_est = res["value"], res["n"], res["evals"], None
+        if res["reason"] != "converged":
+            print(f"Заданная точность не достигнута (причина: {res['reason']}), "
+                  f"достигнутая оценка погрешности: {res['error']:.3e}")
 
     # вывод рез-тов
     print(f"\nРезультаты:")
     print(f"Метод: {method_name}, вариант = {mode if mode else '—'}")
     print(f"Число разбиений, достигнутое для заданной точности: {N}")
     print(f"Приблизительное значение интеграла: {I:.8f}")
+    print(f"Число вычислений функции: {evals}")
+    if err_est is not None:
+        print(f"Оценка погрешности: {err_est:.3e}")
     print(f"Точность (заданная): {eps}")
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        batch_main(sys.argv[2:])
+    else:
+        main()
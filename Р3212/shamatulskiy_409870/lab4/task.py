@@ -1,9 +1,14 @@
+import os
 import sys
 import math
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import numpy as np
-import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataio import iter_point_chunks, load_points
+from plotting import finish, pyplot
 
 # -----------------------------------------------------
 # helpers ------------------------------------------------
@@ -23,29 +28,26 @@ def read_points_interactive():
     return pts
 
 
-def read_points_from_file() -> list:
+def read_points_from_file() -> tuple:
     fname = input("Имя файла с данными: ").strip()
     path = Path(fname)
     if not path.exists():
         print("Файл не найден"); sys.exit(1)
-    pts = []
-    for line in path.read_text().splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        parts = line.replace(",", ".").split()
-        if len(parts) != 2:
-            continue
-        pts.append((float(parts[0]), float(parts[1])))
-    return pts
+    try:
+        return load_points(str(path))
+    except ValueError as e:
+        print(f"Некорректный файл: {e}"); sys.exit(1)
 
 
 def request_points():
     mode = input("Читать точки из файла? (y/n): ").strip().lower()
-    pts = read_points_from_file() if mode == "y" else read_points_interactive()
-    if not (8 <= len(pts) <= 12):
+    if mode == "y":
+        xs, ys = read_points_from_file()
+    else:
+        pts = read_points_interactive()
+        xs, ys = (np.array(v, dtype=float) for v in zip(*pts)) if pts else (np.zeros(0), np.zeros(0))
+    if not (8 <= len(xs) <= 12):
         print("Нужно 8–12 точек"); sys.exit(1)
-    xs, ys = map(np.array, zip(*pts))
     return xs, ys
 
 
@@ -65,75 +67,305 @@ def r2_score(pred, real):
 # -----------------------------------------------------
 # модели ------------------------------------------------
 
-def model_linear(xs, ys):
-    c = np.polyfit(xs, ys, 1)
-    return np.polyval(c, xs), c
-
-def model_poly2(xs, ys):
-    c = np.polyfit(xs, ys, 2)
-    return np.polyval(c, xs), c
-
-def model_poly3(xs, ys):
-    c = np.polyfit(xs, ys, 3)
-    return np.polyval(c, xs), c
-
-def model_expo(xs, ys):
-    if np.any(ys <= 0):
-        return None, None
-    b, ln_a = np.polyfit(xs, np.log(ys), 1)
-    a = math.exp(ln_a)
-    return a * np.exp(b * xs), (a, b)
-
-def model_log(xs, ys):
-    if np.any(xs <= 0):
-        return None, None
-    b, a = np.polyfit(np.log(xs), ys, 1)
-    return a + b * np.log(xs), (a, b)
-
-def model_power(xs, ys):
-    if np.any(xs <= 0) or np.any(ys <= 0):
-        return None, None
-    b, ln_a = np.polyfit(np.log(xs), np.log(ys), 1)
-    a = math.exp(ln_a)
-    return a * xs ** b, (a, b)
-
 MODELS = {
-    "linear":   (model_linear,    "y = a₀ + a₁ x"),
-    "poly2":    (model_poly2,     "y = a₂ x² + a₁ x + a₀"),
-    "poly3":    (model_poly3,     "y = a₃ x³ + a₂ x² + a₁ x + a₀"),
-    "expo":     (model_expo,      "y = A · e^{Bx}"),
-    "log":      (model_log,       "y = A + B · ln x"),
-    "power":    (model_power,     "y = A · x^{B}"),
+    "linear":   "y = a₀ + a₁ x",
+    "poly2":    "y = a₂ x² + a₁ x + a₀",
+    "poly3":    "y = a₃ x³ + a₂ x² + a₁ x + a₀",
+    "expo":     "y = A · e^{Bx}",
+    "log":      "y = A + B · ln x",
+    "power":    "y = A · x^{B}",
 }
 
+
+def predict(name, coeffs, x):
+    if name in ("linear", "poly2", "poly3"):
+        return np.polyval(coeffs, x)
+    a, b = coeffs
+    if name == "expo":
+        return a * np.exp(b * x)
+    if name == "log":
+        return a + b * np.log(x)
+    if name == "power":
+        return a * x ** b
+    raise ValueError(f"Неизвестная модель: {name}")
+
+
+def predict_fit(name, fit, x):
+    # многочлены из fit_from_stats вычисляются в центрированной переменной
+    if fit.get("poly") is not None:
+        return fit["poly"](x)
+    return predict(name, fit["coeffs"], x)
+
 # -----------------------------------------------------
-# main --------------------------------------
+# потоковая аппроксимация --------------------------------
+# Все модели линейны по параметрам после замены переменных, поэтому за один проход
+# копятся степенные суммы t = (x - shift) / scale (до t^6), суммы по
+# u = (ln x - lshift) / lscale, ln y и y^2. Сдвиг и масштаб берутся по первой порции:
+# без центрирования нормальные уравнения при x ~ 1e6 теряют почти всю точность.
+# σ и R² для linear/poly2/poly3/log считаются из тех же сумм; для expo и power
+# остатки в исходных y нелинейны по b, поэтому нужен второй проход по данным.
 
-def main():
-    print("Будут исследоваться следующие формы зависимостей:")
-    for name, (_, formula) in MODELS.items():
-        print(f"  {name:6s}: {formula}")
-    print()
+def stream_stats(chunks):
+    st = None
+    for xs, ys in chunks:
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        if not len(xs):
+            continue
+        if st is None:
+            shift = float(xs.mean())
+            scale = float(np.abs(xs - shift).max()) or 1.0
+            lshift, lscale = 0.0, 1.0
+            if np.all(xs > 0):
+                lx = np.log(xs)
+                lshift = float(lx.mean())
+                lscale = float(np.abs(lx - lshift).max()) or 1.0
+            st = {"n": 0, "shift": shift, "scale": scale, "tp": np.zeros(7), "tpy": np.zeros(4),
+                  "lshift": lshift, "lscale": lscale,
+                  "sy": 0.0, "syy": 0.0, "x_pos": True, "y_pos": True,
+                  "lx": 0.0, "lx2": 0.0, "ylx": 0.0, "ly": 0.0, "tly": 0.0, "lxly": 0.0}
+        t = (xs - st["shift"]) / st["scale"]
+        tk = np.ones_like(t)
+        for k in range(7):
+            st["tp"][k] += tk.sum()
+            if k < 4:
+                st["tpy"][k] += (tk * ys).sum()
+            tk = tk * t
+        st["n"] += len(xs)
+        st["sy"] += ys.sum()
+        st["syy"] += (ys * ys).sum()
+        st["x_pos"] = st["x_pos"] and bool(np.all(xs > 0))
+        st["y_pos"] = st["y_pos"] and bool(np.all(ys > 0))
+        if st["x_pos"]:
+            lx = (np.log(xs) - st["lshift"]) / st["lscale"]
+            st["lx"] += lx.sum()
+            st["lx2"] += (lx * lx).sum()
+            st["ylx"] += (ys * lx).sum()
+        if st["y_pos"]:
+            ly = np.log(ys)
+            st["ly"] += ly.sum()
+            st["tly"] += (t * ly).sum()
+            if st["x_pos"]:
+                st["lxly"] += (lx * ly).sum()
+    return st
 
-    xs, ys = request_points()
 
+def lsq_from_sums(M, v, syy):
+    # МНК по нормальным уравнениям; сумма квадратов остатков из тех же сумм.
+    # Вырожденная система (все x равны) — решение наименьшей нормы, как у polyfit
+    try:
+        c = np.linalg.solve(M, v)
+    except np.linalg.LinAlgError:
+        c = np.linalg.lstsq(M, v, rcond=None)[0]
+    sse = syy - 2 * c @ v + c @ M @ c
+    return c, max(float(sse), 0.0)
+
+
+def fit_from_stats(st):
+    n, shift, scale = st["n"], st["shift"], st["scale"]
+    sst = st["syy"] - st["sy"] ** 2 / n
+    metrics = lambda sse: {"sigma": math.sqrt(sse / n), "r2": 1 - sse / sst if sst else 0.0}
+    results = {}
+    T = st["tp"]
+    for deg, name in ((1, "linear"), (2, "poly2"), (3, "poly3")):
+        M = np.array([[T[i + j] for j in range(deg + 1)] for i in range(deg + 1)])
+        try:
+            c, sse = lsq_from_sums(M, st["tpy"][:deg + 1], st["syy"])
+        except np.linalg.LinAlgError:
+            continue
+        # poly считает в t (точно при больших x), coeffs — те же коэффициенты по степеням x
+        poly = np.polynomial.Polynomial(c, domain=[shift - scale, shift + scale])
+        cx = np.zeros(deg + 1)
+        comp = poly.convert().coef
+        cx[:len(comp)] = comp
+        results[name] = {"coeffs": cx[::-1], "poly": poly, **metrics(sse)}
+    if st["y_pos"]:
+        try:
+            c, _ = lsq_from_sums(np.array([[n, T[1]], [T[1], T[2]]]), np.array([st["ly"], st["tly"]]), 0.0)
+            b = float(c[1] / scale)
+            results["expo"] = {"coeffs": (math.exp(c[0] - b * shift), b)}
+        except np.linalg.LinAlgError:
+            pass
+    if st["x_pos"]:
+        lshift, lscale = st["lshift"], st["lscale"]
+        L = np.array([[n, st["lx"]], [st["lx"], st["lx2"]]])
+        try:
+            c, sse = lsq_from_sums(L, np.array([st["sy"], st["ylx"]]), st["syy"])
+            b = float(c[1] / lscale)
+            results["log"] = {"coeffs": (float(c[0] - b * lshift), b), **metrics(sse)}
+            if st["y_pos"]:
+                c, _ = lsq_from_sums(L, np.array([st["ly"], st["lxly"]]), 0.0)
+                b = float(c[1] / lscale)
+                results["power"] = {"coeffs": (math.exp(c[0] - b * lshift), b)}
+        except np.linalg.LinAlgError:
+            pass
+    return results, sst
+
+
+def stream_fit(make_chunks):
+    """make_chunks() -> новый итератор порций (xs, ys). Один проход для сумм,
+    второй — только для σ моделей expo и power."""
+    st = stream_stats(make_chunks())
+    if st is None:
+        return {}
+    results, sst = fit_from_stats(st)
+    nonlinear = [name for name in ("expo", "power") if name in results]
+    if nonlinear:
+        sse = dict.fromkeys(nonlinear, 0.0)
+        for xs, ys in make_chunks():
+            for name in sse:
+                sse[name] += float(((ys - predict_fit(name, results[name], xs)) ** 2).sum())
+        for name, value in sse.items():
+            results[name]["sigma"] = math.sqrt(value / st["n"])
+            results[name]["r2"] = 1 - value / sst if sst else 0.0
+    return {name: results[name] for name in MODELS if name in results}
+
+
+def fit_all(xs, ys):
+    # все модели из одних и тех же столбцов (t^k, ln x, ln y) и моментных матриц
+    st = stream_stats([(xs, ys)])
+    fitted, _ = fit_from_stats(st) if st is not None else ({}, None)
     results = {}
-    for name, (fn, _) in MODELS.items():
-        pred, coeffs = fn(xs, ys)
-        if pred is None:
+    for name in MODELS:
+        if name not in fitted:
             continue
+        pred = predict_fit(name, fitted[name], xs)
         results[name] = {
             "sigma": rms(pred, ys),
-            "coeffs": coeffs,
+            "coeffs": fitted[name]["coeffs"],
+            "poly": fitted[name].get("poly"),
             "pred": pred,
             "r2": r2_score(pred, ys),
         }
+    return results
+
+
+# -----------------------------------------------------
+# кросс-валидация и бутстрэп -----------------------------
+# Фолды и выборки независимы и считаются в пуле процессов; данные передаются
+# процессу один раз через initializer, задания — только номера фолдов и seed'ы.
+
+WORKER_DATA = {}
+
+
+def init_worker(xs, ys):
+    WORKER_DATA["xs"], WORKER_DATA["ys"] = xs, ys
+
+
+def run_pool(fn, tasks, xs, ys, workers=None):
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(xs, ys)) as pool:
+        return list(pool.map(fn, tasks))
+
+
+def cv_fold(task):
+    fold, k, seed = task
+    xs, ys = WORKER_DATA["xs"], WORKER_DATA["ys"]
+    test = np.zeros(len(xs), dtype=bool)
+    test[np.random.default_rng(seed).permutation(len(xs))[fold::k]] = True
+    fitted = fit_all(xs[~test], ys[~test])
+    return {name: float(((ys[test] - predict_fit(name, r, xs[test])) ** 2).sum())
+            for name, r in fitted.items()}
+
+
+def boot_batch(task):
+    seed, count = task
+    xs, ys = WORKER_DATA["xs"], WORKER_DATA["ys"]
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(count):
+        idx = rng.integers(0, len(xs), len(xs))
+        fitted = fit_all(xs[idx], ys[idx])
+        out.append({name: (r["sigma"], r["r2"], np.asarray(r["coeffs"], dtype=float))
+                    for name, r in fitted.items()})
+    return out
+
+
+def cross_validate(xs, ys, k=5, seed=0, workers=None):
+    """k-блочная кросс-валидация: σ и R² на отложенных точках для каждой модели."""
+    k = min(k, len(xs))
+    parts = run_pool(cv_fold, [(fold, k, seed) for fold in range(k)], xs, ys, workers)
+    sst = float(((ys - ys.mean()) ** 2).sum())
+    res = {}
+    for name in MODELS:
+        if all(name in p for p in parts):
+            sse = sum(p[name] for p in parts)
+            if math.isfinite(sse):
+                res[name] = {"cv_sigma": math.sqrt(sse / len(xs)), "cv_r2": 1 - sse / sst if sst else 0.0}
+    return res
+
+
+def bootstrap(xs, ys, n_boot=1000, alpha=0.05, seed=0, workers=None):
+    """Перцентильные доверительные интервалы σ, R² и коэффициентов по n_boot выборкам."""
+    batches = (workers or os.cpu_count() or 1) * 4
+    sizes = [len(b) for b in np.array_split(np.arange(n_boot), batches) if len(b)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    samples = [s for part in run_pool(boot_batch, list(zip(seeds, sizes)), xs, ys, workers) for s in part]
+    q = (100 * alpha / 2, 100 * (1 - alpha / 2))
+    res = {}
+    for name in MODELS:
+        got = [s[name] for s in samples if name in s]
+        if not got:
+            continue
+        sig = np.array([g[0] for g in got])
+        r2 = np.array([g[1] for g in got])
+        coeffs = np.array([g[2] for g in got])
+        res[name] = {
+            "sigma": tuple(float(v) for v in np.percentile(sig, q)),
+            "r2": tuple(float(v) for v in np.percentile(r2, q)),
+            "coeffs": np.percentile(coeffs, q, axis=0),
+            "n": len(got),
+        }
+    return res
+
+
+# -----------------------------------------------------
+# main --------------------------------------
+
+def main():
+    print("Будут исследоваться следующие формы зависимостей:")
+    for name, formula in MODELS.items():
+        print(f"  {name:6s}: {formula}")
+    print()
+
+    if input("Большой файл (потоковая обработка)? (y/n): ").strip().lower() == "y":
+        path = input("Имя файла с данными: ").strip()
+        if not Path(path).exists():
+            print("Файл не найден"); sys.exit(1)
+        results = stream_fit(lambda: iter_point_chunks(path))
+        if not results:
+            print("Не удалось построить ни одной модели"); sys.exit(1)
+        for name, res in results.items():
+            print(f"{name:6s}: σ={res['sigma']:.3f}  R²={res['r2']:.3f}  coeffs={res['coeffs']}")
+        best_name = min(results, key=lambda n: results[n]["sigma"])
+        print(f"Лучшее приближение => {best_name} (σ={results[best_name]['sigma']:.3f})")
+        return
+
+    xs, ys = request_points()
+
+    results = fit_all(xs, ys)
 
     if not results:
         print("Не удалось построить ни одной модели"); sys.exit(1)
 
     best_name = min(results, key=lambda n: results[n]["sigma"])
 
+    if input("Выбор модели по кросс-валидации и бутстрэпу? (y/n): ").strip().lower() == "y":
+        cv = cross_validate(xs, ys)
+        boot = bootstrap(xs, ys)
+        for name in results:
+            line = f"{name:6s}:"
+            if name in cv:
+                line += f" σ_cv={cv[name]['cv_sigma']:.3f}  R²_cv={cv[name]['cv_r2']:.3f}"
+            if name in boot:
+                b = boot[name]
+                line += (f"  σ∈[{b['sigma'][0]:.3f}, {b['sigma'][1]:.3f}]"
+                         f"  R²∈[{b['r2'][0]:.3f}, {b['r2'][1]:.3f}]"
+                         f"  coeffs∈{np.round(b['coeffs'], 3).tolist()}")
+            print(line)
+        valid = [name for name in results if name in cv]
+        if valid:
+            best_name = min(valid, key=lambda n: cv[n]["cv_sigma"])
+
     out_mode = input("Сохранить результаты в файл? (y/n): ").strip().lower()
     if out_mode == "y":
         out_path = Path(input("Имя выходного файла: ").strip())
@@ -153,26 +385,16 @@ def main():
             r = np.corrcoef(xs, ys)[0, 1]
             print(f"Корреляция Пирсона (linear): r={r:.3f}")
 
+    plt = pyplot()
     plt.scatter(xs, ys, label="data", zorder=3)
     pu = np.linspace(xs.min(), xs.max(), 400)
     for name, res in results.items():
-        if name.startswith("poly"):
-            y_plot = np.polyval(res["coeffs"], pu)
-        elif name == "linear":
-            y_plot = res["coeffs"][0] * pu + res["coeffs"][1]
-        elif name == "expo":
-            y_plot = res["coeffs"][0] * np.exp(res["coeffs"][1] * pu)
-        elif name == "log":
-            y_plot = res["coeffs"][0] + res["coeffs"][1] * np.log(pu)
-        elif name == "power":
-            y_plot = res["coeffs"][0] * pu ** res["coeffs"][1]
-        else:
-            continue
+        y_plot = predict_fit(name, res, pu)
         plt.plot(pu, y_plot, label=name)
     plt.title("Аппроксимация точек")
     plt.legend()
     plt.grid(True)
-    plt.show()
+    finish("lab4")
 
 
 if __name__ == "__main__":
@@ -1,11 +1,43 @@
-import sys, math, numpy as np
-import matplotlib.pyplot as plt
+import os, sys, math, numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataio import load_points
+from plotting import evaluate, finish, pyplot
 
-def finite_diffs(y):
-    table=[y.copy()]
-    while len(table[-1])>1:
-        table.append([table[-1][i+1]-table[-1][i] for i in range(len(table[-1])-1)])
-    return table
+# Упакованная треугольная таблица конечных разностей: для каждого узла m подряд хранится
+# диагональ D[m][k] = Δ^k y_{m-k}, k=0..m (смещение m(m+1)/2). Новый узел добавляет
+# одну диагональ за O(n): D[m][k] = D[m][k-1] - D[m-1][k-1].
+def fd_table(y=()):
+    tab={"n":0,"buf":np.empty(16)}
+    for v in y:
+        fd_append(tab,v)
+    return tab
+
+def fd_append(tab,v):
+    n=tab["n"]
+    off=n*(n+1)//2
+    if off+n+1>len(tab["buf"]):
+        buf=np.empty(max(2*len(tab["buf"]),off+n+1))
+        buf[:off]=tab["buf"][:off]
+        tab["buf"]=buf
+    buf=tab["buf"]
+    if n:
+        buf[off:off+n+1]=np.subtract.accumulate(np.concatenate(([v],buf[off-n:off])))
+    else:
+        buf[off]=v
+    tab["n"]=n+1
+
+def fd_get(tab,k,j):
+    m=j+k
+    return tab["buf"][m*(m+1)//2+k]
+
+def fd_forward(tab):
+    m=np.arange(tab["n"])
+    return tab["buf"][m*(m+1)//2+m]
+
+def fd_backward(tab):
+    n=tab["n"]
+    off=(n-1)*n//2
+    return tab["buf"][off:off+n]
 
 def lagrange(xv,yv,x):
     s=0.0
@@ -17,6 +49,40 @@ def lagrange(xv,yv,x):
         s+=yv[i]*p
     return s
 
+def bary_weights(xv):
+    # w_i = 1/prod(x_i-x_j) через логарифмы, с общим множителем (он сокращается)
+    xv=np.asarray(xv,dtype=float)
+    d=xv[:,None]-xv[None,:]
+    np.fill_diagonal(d,1.0)
+    if np.any(d==0): raise ValueError("Узлы интерполяции должны быть различны")
+    logw=-np.log(np.abs(d)).sum(axis=1)
+    sign=np.where(np.sum(d<0,axis=1)%2,-1.0,1.0)
+    return sign*np.exp(logw-logw.max())
+
+def barycentric(xv,yv,chunk=1<<16):
+    # барицентрическая форма Лагранжа: веса O(n^2) один раз, O(n) на точку
+    xv=np.asarray(xv,dtype=float); yv=np.asarray(yv,dtype=float)
+    w=bary_weights(xv)
+    wy=np.column_stack([w*yv,w])
+    def p(x):
+        x=np.asarray(x,dtype=float)
+        flat=x.ravel()
+        out=np.empty(len(flat))
+        step=max(1,chunk//len(xv))
+        for lo in range(0,len(flat),step):
+            d=np.subtract.outer(flat[lo:lo+step],xv)
+            hit=np.nonzero(d==0)
+            d[hit]=1.0
+            # при попадании в узел знаменатель может обнулиться — значение всё равно заменяется
+            with np.errstate(divide="ignore",invalid="ignore"):
+                np.reciprocal(d,out=d)
+                nd=d@wy
+                res=nd[:,0]/nd[:,1]
+            res[hit[0]]=yv[hit[1]]
+            out[lo:lo+step]=res
+        return out.reshape(x.shape) if x.ndim else float(out[0])
+    return p
+
 def newton_divided(xv,yv,x):
     div=yv.copy()
     n=len(xv)
@@ -28,23 +94,60 @@ def newton_divided(xv,yv,x):
         s=s*(x-xv[k])+div[k]
     return s
 
-def newton_fd(xv,yv,x):
+def newton_fd(xv,yv,x,table=None):
     h=xv[1]-xv[0]
-    table=finite_diffs(yv)
+    table=fd_table(yv) if table is None else table
     n=len(xv)
     if abs(x-xv[0])<abs(x-xv[-1]):
         t=(x-xv[0])/h
-        s,fact=table[0][0],1.0
-        for k in range(1,n):
-            fact*=(t-(k-1))/k
-            s+=fact*table[k][0]
+        diffs=fd_forward(table)
+        sign=-1
     else:
         t=(x-xv[-1])/h
-        s,fact=table[0][-1],1.0
-        for k in range(1,n):
-            fact*=(t+(k-1))/k
-            s+=fact*table[k][-1]
-    return s
+        diffs=fd_backward(table)
+        sign=1
+    s,fact=diffs[0],1.0
+    for k in range(1,n):
+        fact*=(t+sign*(k-1))/k
+        s+=fact*diffs[k]
+    return float(s)
+
+def scalar_or_array(x,out):
+    return out if np.ndim(x) else float(out)
+
+def newton_divided_poly(xv,yv):
+    # таблица разделённых разностей строится один раз, дальше схема Горнера по массиву
+    xv=np.asarray(xv,dtype=float)
+    div=np.array(yv,dtype=float)
+    n=len(xv)
+    for k in range(1,n):
+        div[k:]=(div[k:]-div[k-1:-1])/(xv[k:]-xv[:n-k])
+    def p(x):
+        x=np.asarray(x,dtype=float)
+        s=np.full(x.shape,div[-1])
+        for k in range(n-2,-1,-1):
+            s=s*(x-xv[k])+div[k]
+        return scalar_or_array(x,s)
+    return p
+
+def newton_fd_poly(xv,yv,table=None):
+    # вперёд от x0 для точек ближе к началу, назад от xn — для остальных
+    xv=np.asarray(xv,dtype=float)
+    h=xv[1]-xv[0]
+    table=fd_table(yv) if table is None else table
+    fwd=fd_forward(table).copy()
+    bwd=fd_backward(table).copy()
+    n=len(xv)
+    def p(x):
+        x=np.asarray(x,dtype=float)
+        front=np.abs(x-xv[0])<np.abs(x-xv[-1])
+        t=np.where(front,(x-xv[0])/h,(x-xv[-1])/h)
+        sign=np.where(front,-1.0,1.0)
+        s=np.where(front,fwd[-1],bwd[-1])
+        for k in range(n-1,0,-1):
+            s=np.where(front,fwd[k-1],bwd[k-1])+(t+sign*(k-1))/k*s
+        return scalar_or_array(x,s)
+    return p
 
 def read_points():
     m=int(input("Количество точек: "))
@@ -68,26 +171,13 @@ def func_choice():
     return xv,yv
 
 def load_file(path):
-    with open(path,"r",encoding="utf-8") as f:
-        lines=[l.strip() for l in f if l.strip()]
-    try:
-        count=int(lines[0])
-        data=lines[1:]
-    except ValueError:
-        data=lines
-    xv,yv=[],[]
-    for l in data:
-        parts=l.split()
-        if len(parts)>=2:
-            a,b=map(float,parts[:2])
-            xv.append(a)
-            yv.append(b)
-    return xv,yv
+    return load_points(path)
 
 def plot_method(title,xv,yv,ys_func):
+    plt=pyplot()
     xs=np.linspace(min(xv),max(xv),400)
     plt.figure()
-    plt.plot(xs,[ys_func(xx) for xx in xs])
+    plt.plot(xs,evaluate(ys_func,xs))
     plt.scatter(xv,yv,color="black",zorder=5)
     plt.title(title)
     plt.xlabel("x")
@@ -107,23 +197,25 @@ def main():
     if len(set(steps))!=1:
         print("Шаг по x должен быть равномерным")
         sys.exit()
-    table=finite_diffs(yv)
+    table=fd_table(yv)
     print("Таблица конечных разностей:")
     for i in range(len(xv)):
         row=[f"{xv[i]:g}",f"{yv[i]:g}"]
-        for k in range(1,len(table)):
-            if i<len(table[k]):
-                row.append(f"{table[k][i]:g}")
+        for k in range(1,len(xv)-i):
+            row.append(f"{fd_get(table,k,i):g}")
         print("\t".join(row))
     xq=float(input("Введите X для интерполяции: "))
-    print("Лагранж:",lagrange(xv,yv,xq))
-    print("Ньютон разделённые:",newton_divided(xv,yv,xq))
-    print("Ньютон конечные:",newton_fd(xv,yv,xq))
-
-    plot_method("Lagrange interpolation",xv,yv,lambda x: lagrange(xv,yv,x))
-    plot_method("Newton (divided) interpolation",xv,yv,lambda x: newton_divided(xv,yv,x))
-    plot_method("Newton (finite diffs) interpolation",xv,yv,lambda x: newton_fd(xv,yv,x))
-    plt.show()
+    lag=barycentric(xv,yv)
+    print("Лагранж:",lag(xq))
+    nd=newton_divided_poly(xv,yv)
+    nf=newton_fd_poly(xv,yv,table)
+    print("Ньютон разделённые:",nd(xq))
+    print("Ньютон конечные:",nf(xq))
+
+    plot_method("Lagrange interpolation",xv,yv,lag)
+    plot_method("Newton (divided) interpolation",xv,yv,nd)
+    plot_method("Newton (finite diffs) interpolation",xv,yv,nf)
+    finish("lab5")
 
 if __name__=="__main__":
     main()
\ No newline at end of file
@@ -1,5 +1,9 @@
 import math
-import matplotlib.pyplot as plt
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from plotting import downsample, finish, pyplot
 
 def eq1_f(x, y):
     return x + y
@@ -115,7 +119,8 @@ def main():
     print(f"Максимальная погрешность Милна: {max_err_m:.6e}")
     xs_exact = [x0 + i*h/10 for i in range(int((xn - x0)/(h/10)) + 1)]
     ys_exact = [exact(x, x0, y0) for x in xs_exact]
-    plt.plot(xs_exact, ys_exact, label="Exact", color="black")
+    plt = pyplot()
+    plt.plot(*downsample(xs_exact, ys_exact), label="Exact", color="black")
     plt.plot(xs_e, ys_e, label="Euler", linestyle="--")
     plt.plot(xs_rk, ys_rk, label="RK4", linestyle="-.")
     plt.plot(xs_m, ys_m, label="Milne", linestyle=":")
@@ -123,7 +128,7 @@ def main():
     plt.xlabel("x")
     plt.ylabel("y")
     plt.title("Numerical vs Exact Solution")
-    plt.show()
+    finish("lab6")
 
 if __name__ == "__main__":
     main()
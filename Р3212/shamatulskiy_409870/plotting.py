@@ -0,0 +1,85 @@
+# Общий слой отрисовки для лабораторных.
+# matplotlib импортируется только при первом графике; без дисплея (или при заданной
+# переменной PLOT_DIR) графики пишутся в файлы PLOT_DIR/<имя>.<формат> (PLOT_FORMATS=png,svg).
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+
+def out_dir():
+    return os.environ.get("PLOT_DIR")
+
+
+def headless():
+    return sys.platform.startswith("linux") and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+@lru_cache(maxsize=None)
+def pyplot():
+    import matplotlib
+    if not os.environ.get("MPLBACKEND") and (out_dir() or headless()):
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def finish(name):
+    # вместо plt.show(): в неинтерактивном режиме сохраняем все открытые фигуры
+    plt = pyplot()
+    import matplotlib
+    if not out_dir() and matplotlib.get_backend().lower() != "agg":
+        plt.show()
+        return []
+    folder = out_dir() or "plots"
+    os.makedirs(folder, exist_ok=True)
+    formats = os.environ.get("PLOT_FORMATS", "png").split(",")
+    nums = plt.get_fignums()
+    paths = []
+    for i, num in enumerate(nums, start=1):
+        stem = name if len(nums) == 1 else f"{name}_{i}"
+        for ext in formats:
+            path = os.path.join(folder, f"{stem}.{ext.strip()}")
+            plt.figure(num).savefig(path)
+            paths.append(path)
+    plt.close("all")
+    return paths
+
+
+def evaluate(f, xs):
+    try:
+        ys = np.asarray(f(xs), dtype=float)
+        if ys.shape == xs.shape:
+            return ys
+    except (TypeError, ValueError):
+        pass
+    return np.array([f(x) for x in xs], dtype=float)
+
+
+@lru_cache(maxsize=64)
+def curve(f, a, b, n=1001):
+    xs = np.linspace(a, b, n)
+    return xs, evaluate(f, xs)
+
+
+@lru_cache(maxsize=16)
+def mesh(sysf, a, b, n=400):
+    # сетка n x n и все компоненты sysf, вычисленные один раз
+    xs = np.linspace(a, b, n)
+    X, Y = np.meshgrid(xs, xs)
+    Z = np.asarray(sysf([X, Y]))
+    return X, Y, Z
+
+
+def downsample(xs, ys, px=2000):
+    # min/max в каждом из px столбцов вывода: пики сохраняются, точек не больше 2*px+2
+    xs, ys = np.asarray(xs), np.asarray(ys)
+    if len(xs) <= 2*px:
+        return xs, ys
+    step = len(xs)//px
+    Y = ys[:step*px].reshape(px, step)
+    base = np.arange(px)*step
+    idx = np.unique(np.concatenate([[0], base + np.argmin(Y, axis=1), base + np.argmax(Y, axis=1),
+                                    np.arange(step*px, len(xs)), [len(xs)-1]]))
+    return xs[idx], ys[idx]